@@ -1,15 +1,35 @@
 """Tests for llm-fragments-folder plugin."""
 
+import concurrent.futures
+import os
 import pathlib
+import shutil
+import subprocess
 import textwrap
+import threading
 
+import pathspec
 import pytest
 
+import llm_fragments_folder
 from llm_fragments_folder import (
+    THREADS_ENV_VAR,
+    _build_file_tree,
+    _build_fragments,
     _compile_glob_filter,
+    _compile_spec,
+    _get_git_tracked_files,
+    _get_gitignore_spec,
+    _get_pygit2_files,
+    _is_text_by_name,
     _is_text_file,
+    _iter_fragments,
+    _iter_project_fragments,
+    _name_suffix,
     _parse_argument,
     _read_file_safe,
+    _read_workers,
+    _scan_folder,
     _should_skip_dir,
     _walk_folder,
     folder_loader,
@@ -73,6 +93,15 @@ def git_project(tmp_path):
     return tmp_path
 
 
+@pytest.fixture
+def real_git_repo(git_project):
+    """Turn git_project into an actual git repository."""
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+    subprocess.run(["git", "init", "-q"], cwd=git_project, check=True)
+    return git_project
+
+
 class TestIsTextFile:
     def test_markdown(self, tmp_path):
         f = tmp_path / "test.md"
@@ -104,6 +133,11 @@ class TestIsTextFile:
         f.write_text("#!/bin/bash\necho hello")
         assert _is_text_file(f) is True
 
+    def test_extensionless_without_shebang(self, tmp_path):
+        f = tmp_path / "notes"
+        f.write_text("just some text")
+        assert _is_text_file(f) is False
+
     def test_bashrc(self, tmp_path):
         f = tmp_path / ".bashrc"
         f.write_text("export PATH=/usr/local/bin")
@@ -114,6 +148,35 @@ class TestIsTextFile:
         f.write_text("[user]\n  name = Test")
         assert _is_text_file(f) is True
 
+    def test_uppercase_extension(self, tmp_path):
+        f = tmp_path / "NOTES.MD"
+        f.write_text("hello")
+        assert _is_text_file(f) is True
+
+    def test_by_name_needs_no_io(self, tmp_path):
+        assert _is_text_by_name("main.py") is True
+        assert _is_text_by_name("Makefile") is True
+        assert _is_text_by_name(".bashrc") is True
+        assert _is_text_by_name("image.png") is False
+        # Extensionless files can only be decided by the shebang probe
+        assert _is_text_by_name("myscript") is None
+        assert _is_text_by_name(".unknownrc") is None
+
+    def test_name_suffix_matches_pathlib(self):
+        names = [
+            "README.md",
+            "NOTES.MD",
+            "archive.tar.gz",
+            ".bashrc",
+            ".env.example",
+            "..hidden",
+            "trailing.",
+            "Makefile",
+            "a.b.PY",
+        ]
+        for name in names:
+            assert _name_suffix(name) == pathlib.PurePath(name).suffix.lower()
+
 
 class TestShouldSkipDir:
     def test_node_modules(self):
@@ -151,6 +214,42 @@ class TestReadFileSafe:
         f.write_bytes(b"%PDF-1.4\x00some binary content")
         assert _read_file_safe(f) is None
 
+    def test_reads_past_binary_probe(self, tmp_path):
+        f = tmp_path / "long.txt"
+        f.write_text("a" * 10_000 + "tail")
+        assert _read_file_safe(f) == "a" * 10_000 + "tail"
+
+    def test_only_probe_window_is_scanned(self, tmp_path):
+        f = tmp_path / "late_null.txt"
+        f.write_bytes(b"a" * 8192 + b"\x00tail")
+        assert _read_file_safe(f) == "a" * 8192 + "\x00tail"
+
+    def test_reads_mapped_file(self, tmp_path):
+        f = tmp_path / "big.txt"
+        text = "caf\u00e9 line\n" * 20_000
+        f.write_text(text, encoding="utf-8")
+        assert _read_file_safe(f) == text
+
+    def test_skips_mapped_binary(self, tmp_path):
+        f = tmp_path / "big.bin"
+        f.write_bytes(b"\x7fELF\x00" + b"x" * 200_000)
+        assert _read_file_safe(f) is None
+
+    def test_mapped_invalid_utf8_is_replaced(self, tmp_path):
+        f = tmp_path / "latin1.txt"
+        f.write_bytes(b"a" * 200_000 + b"\xff")
+        assert _read_file_safe(f) == "a" * 200_000 + "\ufffd"
+
+    def test_skips_binary_magic_without_null_bytes(self, tmp_path):
+        f = tmp_path / "doc.pdf"
+        f.write_bytes(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        assert _read_file_safe(f) is None
+
+    def test_skips_mapped_binary_magic(self, tmp_path):
+        f = tmp_path / "big.zip"
+        f.write_bytes(b"PK\x03\x04" + b"y" * 200_000)
+        assert _read_file_safe(f) is None
+
     def test_skips_large_files(self, tmp_path):
         f = tmp_path / "big.txt"
         f.write_text("x" * 100)
@@ -190,6 +289,11 @@ class TestCompileGlobFilter:
         assert _compile_glob_filter("") is None
         assert _compile_glob_filter("  ,  ") is None
 
+    def test_compiled_once_per_pattern_string(self):
+        assert _compile_glob_filter("*.md,!docs/**") is _compile_glob_filter(
+            "*.md,!docs/**"
+        )
+
     def test_wildcard_substring(self):
         spec = _compile_glob_filter("*finance*")
         assert spec.match_file("finance_report.md")
@@ -197,6 +301,54 @@ class TestCompileGlobFilter:
         assert not spec.match_file("readme.md")
 
 
+class TestCompileSpec:
+    PATHS = [
+        "README.md",
+        "secret.env",
+        "config/prod.env",
+        "dist/bundle.js",
+        "src/dist/x.js",
+        "distribution.txt",
+        "build/out.o",
+        "src/build/out.o",
+        "docs/guide.md",
+        "a/b/c/notes.txt",
+        "archive.tar.gz",
+        ".DS_Store",
+        "sub/.DS_Store",
+        "tests/test_main.py",
+    ]
+
+    def check(self, lines):
+        expected = pathspec.PathSpec.from_lines("gitignore", lines)
+        spec = _compile_spec(lines)
+        for path in self.PATHS:
+            assert spec.match_file(path) == expected.match_file(path), path
+
+    def test_suffix_and_name_patterns(self):
+        self.check(["*.env", "*.tar.gz", ".DS_Store", "dist"])
+
+    def test_general_patterns(self):
+        self.check(["dist/", "/build", "docs/**", "a/**/*.txt", "[Rr]EADME.md"])
+        self.check(["*/"])
+        self.check(["**/"])
+        self.check(["/**/", "*.env"])
+
+    def test_comments_and_blank_lines(self):
+        self.check(["# comment", "", "*.env"])
+
+    def test_trailing_negations(self):
+        lines = ["*.py", "*.md", "!tests/**", "!*.txt", "!README.md"]
+        assert not isinstance(_compile_spec(lines), pathspec.PathSpec)
+        self.check(lines)
+        self.check(["!docs/**"])
+
+    def test_interleaved_negation_uses_pathspec(self):
+        lines = ["*.py", "!tests/**", "tests/test_main.py"]
+        assert isinstance(_compile_spec(lines), pathspec.PathSpec)
+        self.check(lines)
+
+
 class TestParseArgument:
     def test_empty_string(self):
         path, gf = _parse_argument("")
@@ -287,6 +439,97 @@ class TestWalkFolder:
         files = _walk_folder(sample_folder, max_files=2)
         assert len(files) <= 2
 
+    def test_depth_first_sorted_order(self, tmp_path):
+        (tmp_path / "b.md").write_text("b")
+        (tmp_path / "a.md").write_text("a")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "c.md").write_text("c")
+        (tmp_path / "z.md").write_text("z")
+        files = _walk_folder(tmp_path)
+        rels = [str(f.relative_to(tmp_path.resolve())) for f in files]
+        assert rels == ["a.md", "b.md", "z.md", str(pathlib.Path("sub/c.md"))]
+
+    def test_scan_returns_relative_paths(self, sample_folder):
+        entries = _scan_folder(sample_folder)
+        root = sample_folder.resolve()
+        for path, rel_path in entries:
+            assert pathlib.Path(path) == root / rel_path
+        assert str(pathlib.Path("docs/guide.md")) in {rel for _, rel in entries}
+
+    def test_does_not_follow_symlinked_dirs(self, tmp_path):
+        target = tmp_path / "target"
+        target.mkdir()
+        (target / "inner.md").write_text("inner")
+        root = tmp_path / "root"
+        root.mkdir()
+        (root / "top.md").write_text("top")
+        (root / "link").symlink_to(target, target_is_directory=True)
+        names = {f.name for f in _walk_folder(root)}
+        assert names == {"top.md"}
+
+    def test_symlink_loop_is_skipped(self, tmp_path):
+        (tmp_path / "a.md").write_text("hi")
+        (tmp_path / "loop").symlink_to(tmp_path / "loop")
+        assert [f.name for f in _walk_folder(tmp_path)] == ["a.md"]
+        fragments = folder_loader(str(tmp_path))
+        assert [str(f) for f in fragments] == ["--- a.md ---\nhi"]
+
+    def test_max_files_stops_listing_directories(self, tmp_path, monkeypatch):
+        (tmp_path / "top.md").write_text("top")
+        for i in range(5):
+            sub = tmp_path / f"sub{i}"
+            sub.mkdir()
+            (sub / "file.md").write_text("x")
+        listed = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path):
+            listed.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+        files = _walk_folder(tmp_path, max_files=1)
+        assert [f.name for f in files] == ["top.md"]
+        assert len(listed) == 1
+
+    def test_shebang_probe_runs_after_gitignore(self, git_project, monkeypatch):
+        (git_project / ".gitignore").write_text("bin/\n")
+        (git_project / "bin").mkdir()
+        (git_project / "bin" / "tool").write_text("#!/bin/sh\necho hi")
+        (git_project / "run").write_text("#!/bin/sh\necho run")
+        probed = []
+        real_probe = llm_fragments_folder._has_shebang
+
+        def recording_probe(path):
+            probed.append(os.path.basename(path))
+            return real_probe(path)
+
+        monkeypatch.setattr(llm_fragments_folder, "_has_shebang", recording_probe)
+        names = {f.name for f in _walk_folder(git_project, respect_gitignore=True)}
+        assert "run" in names
+        assert "tool" not in names
+        assert probed == ["run"]
+
+    def test_root_listed_while_ignore_rules_load(self, tmp_path, monkeypatch):
+        (tmp_path / "keep.md").write_text("keep")
+        (tmp_path / "drop.md").write_text("drop")
+        listed = threading.Event()
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.set()
+            return real_scandir(path)
+
+        def slow_filters(root):
+            # Only returns once the walker has started on the root directory
+            assert listed.wait(timeout=5)
+            return None, _compile_spec(["drop.md"])
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+        monkeypatch.setattr(llm_fragments_folder, "_get_ignore_filters", slow_filters)
+        files = _walk_folder(tmp_path, respect_gitignore=True)
+        assert [f.name for f in files] == ["keep.md"]
+
     def test_not_a_directory(self, tmp_path):
         fake = tmp_path / "nonexistent"
         with pytest.raises(ValueError, match="Not a directory"):
@@ -349,6 +592,35 @@ class TestWalkFolder:
         assert "README.md" in names
         assert "guide.md" not in names
 
+    def test_glob_negated_directory_not_listed(self, sample_folder, monkeypatch):
+        (sample_folder / "src" / "docs").mkdir(parents=True)
+        (sample_folder / "src" / "docs" / "kept.md").write_text("kept")
+        listed = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.append(pathlib.Path(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+        gf = _compile_glob_filter("*.md,!docs/**")
+        names = {f.name for f in _walk_folder(sample_folder, glob_filter=gf)}
+        assert sample_folder.resolve() / "docs" not in listed
+        # The pattern is anchored: only the top-level docs/ is pruned
+        assert "kept.md" in names
+
+    def test_glob_negated_direct_children_still_listed(self, tmp_path):
+        (tmp_path / "out" / "sub").mkdir(parents=True)
+        (tmp_path / "out" / "a.py").write_text("a")
+        (tmp_path / "out" / "sub" / "b.py").write_text("b")
+        gf = _compile_glob_filter("*.py,!out/*")
+        rels = {
+            f.relative_to(tmp_path.resolve()).as_posix()
+            for f in _walk_folder(tmp_path, glob_filter=gf)
+        }
+        # "out/*" negates only direct children of out/
+        assert rels == {"out/sub/b.py"}
+
     def test_glob_binary_files_skipped_by_read(self, sample_folder):
         """Binary files matched by glob are still skipped by _read_file_safe."""
         (sample_folder / "data.bin").write_bytes(b"\x00\x01\x02\x03")
@@ -369,6 +641,184 @@ class TestWalkFolder:
         # dist/ should be ignored
         assert "bundle.js" not in names
 
+    def test_gitignored_directory_not_listed(self, git_project, monkeypatch):
+        (git_project / ".gitignore").write_text("out/\n")
+        (git_project / "out").mkdir()
+        (git_project / "out" / "gen.py").write_text("x = 1")
+        listed = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.append(pathlib.Path(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+        _walk_folder(git_project, respect_gitignore=True)
+        assert git_project.resolve() / "out" not in listed
+
+    def test_gitignored_directory_hides_nested_files(self, git_project):
+        # git never descends into an ignored directory, so "foo/*" hiding
+        # foo/bar/ also hides foo/bar/baz.py
+        (git_project / ".gitignore").write_text("foo/*\n")
+        (git_project / "foo" / "bar").mkdir(parents=True)
+        (git_project / "foo" / "bar" / "baz.py").write_text("x = 1")
+        names = {f.name for f in _walk_folder(git_project, respect_gitignore=True)}
+        assert "baz.py" not in names
+        assert "app.py" in names
+
+    def test_gitignore_negation_reaches_into_directory(self, git_project):
+        (git_project / ".gitignore").write_text("out/*\n!out/keep.py\n")
+        (git_project / "out").mkdir()
+        (git_project / "out" / "keep.py").write_text("kept")
+        (git_project / "out" / "gen.py").write_text("x = 1")
+        names = {f.name for f in _walk_folder(git_project, respect_gitignore=True)}
+        assert "keep.py" in names
+        assert "gen.py" not in names
+
+    def test_nested_gitignore_respected(self, git_project):
+        pkg = git_project / "pkg"
+        (pkg / "gen").mkdir(parents=True)
+        (pkg / ".gitignore").write_text("*.txt\n/gen/\n")
+        (pkg / "mod.py").write_text("x = 1")
+        (pkg / "debug.txt").write_text("log")
+        (pkg / "gen" / "out.py").write_text("y = 2")
+        (git_project / "debug.txt").write_text("kept")
+        (git_project / "gen").mkdir()
+        (git_project / "gen" / "top.py").write_text("z = 3")
+        files = _walk_folder(git_project, respect_gitignore=True)
+        rels = {f.relative_to(git_project.resolve()).as_posix() for f in files}
+        assert {"pkg/mod.py", "debug.txt", "gen/top.py"} <= rels
+        # Rules only apply below the directory holding the .gitignore
+        assert "pkg/debug.txt" not in rels
+        assert "pkg/gen/out.py" not in rels
+        # The root .gitignore still applies inside pkg/
+        (pkg / "local.env").write_text("X=1")
+        names = {f.name for f in _walk_folder(git_project, respect_gitignore=True)}
+        assert "local.env" not in names
+
+
+class TestBuildFragments:
+    def test_preserves_file_order(self, tmp_path):
+        for i in range(40):
+            (tmp_path / f"f{i:02d}.txt").write_text(f"content {i}")
+        entries = _scan_folder(tmp_path)
+        fragments = _build_fragments(tmp_path, entries, "folder")
+        assert [str(f) for f in fragments] == [
+            f"--- f{i:02d}.txt ---\ncontent {i}" for i in range(40)
+        ]
+
+    def test_small_batches_read_without_pool(self, tmp_path, monkeypatch):
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "b.txt").write_text("b")
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("thread pool should not be used")
+
+        monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", no_pool)
+        entries = _scan_folder(tmp_path)
+        fragments = _build_fragments(tmp_path, entries, "folder")
+        assert [str(f) for f in fragments] == [
+            "--- a.txt ---\na",
+            "--- b.txt ---\nb",
+        ]
+
+    def test_skips_unreadable_files(self, tmp_path):
+        (tmp_path / "good.txt").write_text("good")
+        (tmp_path / "bad.txt").write_bytes(b"\x00bad")
+        entries = _scan_folder(tmp_path)
+        fragments = _build_fragments(tmp_path, entries, "folder")
+        assert [str(f) for f in fragments] == ["--- good.txt ---\ngood"]
+
+    def test_relative_headers_and_sources(self, sample_folder):
+        entries = _scan_folder(
+            sample_folder, glob_filter=_compile_glob_filter("docs/*")
+        )
+        fragments = _build_fragments(sample_folder, entries, "folder")
+        by_source = {f.source: str(f) for f in fragments}
+        rel = str(pathlib.Path("docs/guide.md"))
+        assert by_source[f"folder:{sample_folder}/{rel}"].startswith(f"--- {rel} ---")
+
+    def test_iter_fragments_yields_incrementally(self, tmp_path, monkeypatch):
+        for i in range(20):
+            (tmp_path / f"f{i:02d}.txt").write_text(f"content {i}")
+        entries = _scan_folder(tmp_path)
+        monkeypatch.setenv(THREADS_ENV_VAR, "1")
+        fragments = _iter_fragments(tmp_path, entries, "folder")
+        assert str(next(fragments)) == "--- f00.txt ---\ncontent 0"
+        assert str(next(fragments)) == "--- f01.txt ---\ncontent 1"
+        fragments.close()
+
+    def test_threads_env_override(self, monkeypatch):
+        monkeypatch.setenv(THREADS_ENV_VAR, "3")
+        assert _read_workers() == 3
+
+    def test_threads_env_invalid(self, monkeypatch):
+        monkeypatch.setenv(THREADS_ENV_VAR, "many")
+        assert _read_workers() >= 1
+
+
+class TestGetGitignoreSpec:
+    def test_missing_gitignore(self, tmp_path):
+        assert _get_gitignore_spec(tmp_path) is None
+
+    def test_reuses_compiled_spec(self, git_project):
+        assert _get_gitignore_spec(git_project) is _get_gitignore_spec(git_project)
+
+    def test_recompiles_after_change(self, git_project):
+        gitignore = git_project / ".gitignore"
+        before = _get_gitignore_spec(git_project)
+        assert before.match_file("secret.env")
+        gitignore.write_text("*.py\n")
+        st = gitignore.stat()
+        os.utime(gitignore, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        after = _get_gitignore_spec(git_project)
+        assert after is not before
+        assert after.match_file("app.py")
+        assert not after.match_file("secret.env")
+
+
+class TestGitTrackedFiles:
+    def test_lists_untracked_not_ignored(self, real_git_repo):
+        files = _get_git_tracked_files(real_git_repo)
+        assert files is not None
+        assert b"README.md" in files
+        assert b"app.py" in files
+        assert b"secret.env" not in files
+        assert b"dist/bundle.js" not in files
+
+    def test_unusual_filenames(self, real_git_repo):
+        (real_git_repo / "caf\u00e9.md").write_text("accent")
+        (real_git_repo / "two\nlines.md").write_text("newline")
+        files = _get_git_tracked_files(real_git_repo)
+        assert files is not None
+        assert "caf\u00e9.md".encode() in files
+        assert b"two\nlines.md" in files
+        names = {f.name for f in _walk_folder(real_git_repo, respect_gitignore=True)}
+        assert "caf\u00e9.md" in names
+        assert "two\nlines.md" in names
+
+    def test_not_a_repo(self, tmp_path):
+        assert _get_git_tracked_files(tmp_path) is None
+
+    def test_pygit2_matches_git_cli(self, real_git_repo, monkeypatch):
+        pytest.importorskip("pygit2")
+        sub = real_git_repo / "src" / "pkg"
+        sub.mkdir(parents=True)
+        (sub / "mod.py").write_text("x = 1")
+        (sub / "debug.env").write_text("ignored")
+        (real_git_repo / "src" / "top.py").write_text("y = 2")
+        subprocess.run(["git", "add", "src/top.py"], cwd=real_git_repo, check=True)
+        for path in (real_git_repo, real_git_repo / "src", sub):
+            in_process = _get_pygit2_files(path)
+            with monkeypatch.context() as m:
+                m.setattr("llm_fragments_folder._get_pygit2_files", lambda root: None)
+                cli = _get_git_tracked_files(path)
+            assert in_process == cli
+
+    def test_pygit2_not_a_repo(self, tmp_path):
+        pytest.importorskip("pygit2")
+        assert _get_pygit2_files(tmp_path) is None
+
 
 class TestFolderLoader:
     def test_loads_fragments(self, sample_folder):
@@ -377,6 +827,28 @@ class TestFolderLoader:
         assert any("My Project" in str(f) for f in fragments)
         assert any("print('hello')" in str(f) for f in fragments)
 
+    def test_root_resolved_once(self, sample_folder, monkeypatch):
+        calls = []
+        real_resolve = pathlib.Path.resolve
+
+        def counting_resolve(self, strict=False):
+            calls.append(self)
+            return real_resolve(self, strict)
+
+        monkeypatch.setattr(pathlib.Path, "resolve", counting_resolve)
+        folder_loader(str(sample_folder))
+        assert calls == [sample_folder]
+
+    def test_fragments_in_sorted_order(self, tmp_path):
+        for name in ["c.md", "a.md", "b.md"]:
+            (tmp_path / name).write_text(name)
+        fragments = folder_loader(str(tmp_path))
+        assert [str(f).splitlines()[0] for f in fragments] == [
+            "--- a.md ---",
+            "--- b.md ---",
+            "--- c.md ---",
+        ]
+
     def test_empty_folder(self, tmp_path):
         empty = tmp_path / "empty"
         empty.mkdir()
@@ -406,6 +878,43 @@ class TestFolderLoader:
         assert any("My Project" in c for c in contents)
 
 
+class TestBuildFileTree:
+    def test_nested_layout(self):
+        sep = os.sep
+        rel_paths = [
+            "README.md",
+            f"docs{sep}api.txt",
+            f"docs{sep}guide{sep}intro.md",
+            f"docs{sep}guide{sep}setup.md",
+            f"docs{sep}z.md",
+            f"src{sep}main.py",
+        ]
+        assert _build_file_tree("demo", rel_paths) == textwrap.dedent("""\
+            Project: demo
+
+            README.md
+            docs/
+              api.txt
+              guide/
+                intro.md
+                setup.md
+              z.md
+            src/
+              main.py""")
+
+    def test_sibling_dirs_with_same_name(self):
+        sep = os.sep
+        rel_paths = [f"a{sep}lib{sep}x.py", f"b{sep}lib{sep}y.py"]
+        assert _build_file_tree("demo", rel_paths).splitlines()[2:] == [
+            "a/",
+            "  lib/",
+            "    x.py",
+            "b/",
+            "  lib/",
+            "    y.py",
+        ]
+
+
 class TestProjectLoader:
     def test_includes_file_tree(self, sample_folder):
         fragments = project_loader(str(sample_folder))
@@ -416,3 +925,16 @@ class TestProjectLoader:
         fragments = project_loader(str(sample_folder))
         assert len(fragments) >= 4  # tree + at least 3 files
         assert any("My Project" in str(f) for f in fragments[1:])
+
+    def test_tree_is_yielded_before_any_read(self, sample_folder, monkeypatch):
+        entries = _scan_folder(sample_folder)
+
+        def no_reads(path, max_size=0):
+            raise AssertionError("file read before the tree was consumed")
+
+        monkeypatch.setattr(llm_fragments_folder, "_read_file_safe", no_reads)
+        fragments = _iter_project_fragments(sample_folder, "demo", entries)
+        tree = next(fragments)
+        assert tree.source == f"project:{sample_folder}/FILE_TREE"
+        assert str(tree).startswith("Project: demo")
+        fragments.close()